@@ -6,6 +6,19 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 import json
 
+# orjson round-trips the per-claim JSON blobs several times faster than
+# stdlib json; fall back silently when it isn't installed
+try:
+    import orjson
+
+    def _json_dumps(obj):
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
 db = SQLAlchemy()
 
 
@@ -28,7 +41,15 @@ class User(db.Model):
 class Claim(db.Model):
     """Medical claim model"""
     __tablename__ = 'claims'
-    
+    __table_args__ = (
+        # Covering index for the duplicate-claim lookup on upload
+        db.Index('ix_claim_dup_lookup', 'patient_id', 'diagnosis_code',
+                 'procedure_code', 'treatment_cost', 'created_at'),
+        # Matches the "my recent claims" query: equality on uploaded_by,
+        # ordered by claim_date (scanned backwards for DESC)
+        db.Index('ix_claims_uploaded_by_date', 'uploaded_by', 'claim_date'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     claim_id = db.Column(db.String(20), unique=True, nullable=False, index=True)
     patient_id = db.Column(db.String(20), nullable=False, index=True)
@@ -42,27 +63,38 @@ class Claim(db.Model):
     hospital_id = db.Column(db.String(20), nullable=False)
     
     # Validation results
-    validation_status = db.Column(db.String(20), default='Pending')  # Approved, Rejected, Manual Review
+    validation_status = db.Column(db.String(20), default='Pending', index=True)  # Approved, Rejected, Manual Review
     validation_reason = db.Column(db.Text)
     fraud_probability = db.Column(db.Float, default=0.0)
     confidence_score = db.Column(db.Float, default=0.0)
     
     # Validation details (JSON)
     validation_details = db.Column(db.Text)  # JSON string
-    ml_predictions = db.Column(db.Text)  # JSON string
+
+    # ML prediction outputs (typed columns, one per model, so SQL can
+    # filter/aggregate on them without JSON parsing)
+    lr_prob = db.Column(db.Float)
+    rf_prob = db.Column(db.Float)
+    iso_pred = db.Column(db.Integer)
+    ensemble_proba = db.Column(db.Float)
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'))
-    
+    uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+
+    # One-to-one link to the bot's per-claim report; joined-eager so the
+    # bot endpoints load claim + report in a single query
+    validation_report = db.relationship('ClaimValidationReport', backref='claim',
+                                        uselist=False, lazy='joined')
+
     def __repr__(self):
         return f'<Claim {self.claim_id}>'
     
     def get_validation_details(self):
         """Parse JSON validation details"""
         if self.validation_details:
-            details = json.loads(self.validation_details)
+            details = _json_loads(self.validation_details)
             # If it's a dict with 'details' key (old format), return the list
             if isinstance(details, dict) and 'details' in details:
                 return details['details']
@@ -84,17 +116,18 @@ class Claim(db.Model):
     
     def set_validation_details(self, details):
         """Set validation details as JSON"""
-        self.validation_details = json.dumps(details)
+        self.validation_details = _json_dumps(details)
     
     def get_ml_predictions(self):
-        """Parse JSON ML predictions"""
-        if self.ml_predictions:
-            return json.loads(self.ml_predictions)
-        return {}
-    
-    def set_ml_predictions(self, predictions):
-        """Set ML predictions as JSON"""
-        self.ml_predictions = json.dumps(predictions)
+        """ML prediction outputs as a dict (template/API convenience)"""
+        if self.ensemble_proba is None and self.lr_prob is None:
+            return {}
+        return {
+            'lr_prob': self.lr_prob or 0.0,
+            'rf_prob': self.rf_prob or 0.0,
+            'iso_pred': self.iso_pred or 0,
+            'ensemble_proba': self.ensemble_proba or 0.0,
+        }
 
 
 class BillUpload(db.Model):
@@ -105,7 +138,10 @@ class BillUpload(db.Model):
     filename = db.Column(db.String(255), nullable=False)
     filepath = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(10), default='pdf')  # pdf, image
+    status = db.Column(db.String(20), default='processing')  # processing, done, failed
     extracted_text = db.Column(db.Text)
+    extracted_text_preview = db.Column(db.String(220))  # first ~200 chars for list views
+    extraction_result = db.Column(db.Text)  # JSON: extracted fields or error
     claim_id = db.Column(db.String(20), db.ForeignKey('claims.claim_id'))
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -145,17 +181,57 @@ class ClaimValidationReport(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     claim_id = db.Column(db.Integer, db.ForeignKey('claims.id'), unique=True, index=True)
     approval_status = db.Column(db.String(20), default='PENDING')  # APPROVED, REJECTED, PENDING
-    violations = db.Column(db.Text)  # Comma-separated violation codes
     fraud_risk_score = db.Column(db.Float, default=0.0)  # 0-100
-    anomaly_flags = db.Column(db.Text)  # Comma-separated anomaly types
-    missing_documents = db.Column(db.Text)  # Comma-separated missing doc types
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
+
+    # Normalized child rows (previously comma-separated TEXT columns);
+    # selectin-loaded so the bot endpoints get them in one extra query
+    # per report instead of parsing strings per request
+    violations = db.relationship('ClaimViolation', lazy='selectin',
+                                 cascade='all, delete-orphan')
+    anomaly_flags = db.relationship('ClaimAnomalyFlag', lazy='selectin',
+                                    cascade='all, delete-orphan')
+    missing_documents = db.relationship('ClaimMissingDocument', lazy='selectin',
+                                        cascade='all, delete-orphan')
+
     def __repr__(self):
         return f'<ClaimValidationReport {self.claim_id}>'
 
 
+class ClaimViolation(db.Model):
+    """Violation code attached to a claim validation report"""
+    __tablename__ = 'claim_violations'
+    __table_args__ = (db.UniqueConstraint('report_id', 'code'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('claim_validation_reports.id'),
+                          nullable=False, index=True)
+    code = db.Column(db.String(50), nullable=False, index=True)
+
+
+class ClaimAnomalyFlag(db.Model):
+    """Anomaly type attached to a claim validation report"""
+    __tablename__ = 'claim_anomaly_flags'
+    __table_args__ = (db.UniqueConstraint('report_id', 'code'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('claim_validation_reports.id'),
+                          nullable=False, index=True)
+    code = db.Column(db.String(50), nullable=False, index=True)
+
+
+class ClaimMissingDocument(db.Model):
+    """Missing document type attached to a claim validation report"""
+    __tablename__ = 'claim_missing_documents'
+    __table_args__ = (db.UniqueConstraint('report_id', 'doc_type'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.Integer, db.ForeignKey('claim_validation_reports.id'),
+                          nullable=False, index=True)
+    doc_type = db.Column(db.String(50), nullable=False, index=True)
+
+
 class AnomalyLog(db.Model):
     """Log for detected anomalies"""
     __tablename__ = 'anomaly_logs'
@@ -173,16 +249,156 @@ class AnomalyLog(db.Model):
     def get_details(self):
         """Parse JSON details"""
         if self.details:
-            return json.loads(self.details)
+            return _json_loads(self.details)
         return {}
     
     def set_details(self, details):
         """Set details as JSON"""
-        self.details = json.dumps(details)
+        self.details = _json_dumps(details)
+
+
+def _table_columns(conn, table):
+    """Set of column names currently on a SQLite table"""
+    return {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info({table})')}
+
+
+def _drop_column(conn, table, column):
+    """Drop a column, tolerating SQLite builds that predate 3.35"""
+    try:
+        conn.exec_driver_sql(f'ALTER TABLE {table} DROP COLUMN {column}')
+    except Exception:
+        pass  # old SQLite: the unmapped column stays behind, harmlessly
+
+
+def _migrate_claims_ml_columns(conn):
+    """Move claims.ml_predictions JSON into the typed per-model columns
+
+    create_all never alters existing tables, so deployments that predate
+    the typed columns would fail every Claim query with "no such column".
+    Add the columns in place and parse the old JSON blobs into them.
+    """
+    cols = _table_columns(conn, 'claims')
+    if 'ml_predictions' not in cols:
+        return
+
+    for name, sql_type in (('lr_prob', 'FLOAT'), ('rf_prob', 'FLOAT'),
+                           ('iso_pred', 'INTEGER'), ('ensemble_proba', 'FLOAT')):
+        if name not in cols:
+            conn.exec_driver_sql(f'ALTER TABLE claims ADD COLUMN {name} {sql_type}')
+
+    rows = conn.exec_driver_sql(
+        "SELECT id, ml_predictions FROM claims "
+        "WHERE ml_predictions IS NOT NULL AND ml_predictions != ''").fetchall()
+    for row_id, blob in rows:
+        try:
+            preds = _json_loads(blob)
+        except ValueError:
+            continue
+        if not isinstance(preds, dict):
+            continue
+        conn.exec_driver_sql(
+            'UPDATE claims SET lr_prob = ?, rf_prob = ?, iso_pred = ?, '
+            'ensemble_proba = ? WHERE id = ?',
+            (preds.get('lr_prob'), preds.get('rf_prob'),
+             preds.get('iso_pred'), preds.get('ensemble_proba'), row_id))
+
+    _drop_column(conn, 'claims', 'ml_predictions')
+    print("✓ Migrated claims.ml_predictions to typed columns")
+
+
+def _migrate_bill_uploads_async_columns(conn):
+    """Add the background-extraction columns to an existing bill_uploads"""
+    cols = _table_columns(conn, 'bill_uploads')
+    if 'status' not in cols:
+        conn.exec_driver_sql(
+            "ALTER TABLE bill_uploads ADD COLUMN status VARCHAR(20) "
+            "DEFAULT 'processing'")
+        # Pre-existing rows predate background extraction; whatever they
+        # hold is their final state
+        conn.exec_driver_sql("UPDATE bill_uploads SET status = 'done'")
+    if 'extraction_result' not in cols:
+        conn.exec_driver_sql(
+            'ALTER TABLE bill_uploads ADD COLUMN extraction_result TEXT')
+    if 'extracted_text_preview' not in cols:
+        conn.exec_driver_sql(
+            'ALTER TABLE bill_uploads ADD COLUMN extracted_text_preview '
+            'VARCHAR(220)')
+        # Same shape the upload path writes: first 200 chars plus ellipsis
+        conn.exec_driver_sql(
+            "UPDATE bill_uploads SET extracted_text_preview = "
+            "substr(extracted_text, 1, 200) || '...' "
+            "WHERE extracted_text IS NOT NULL AND extracted_text != ''")
+
+
+def _migrate_report_csv_columns(conn):
+    """Split the old CSV report columns into the normalized child tables
+
+    Runs after create_all, so the child tables already exist. INSERT OR
+    IGNORE keeps the backfill idempotent on SQLite builds where the
+    legacy columns can't be dropped and the pass re-runs each boot.
+    """
+    cols = _table_columns(conn, 'claim_validation_reports')
+    legacy = (('violations', 'claim_violations', 'code'),
+              ('anomaly_flags', 'claim_anomaly_flags', 'code'),
+              ('missing_documents', 'claim_missing_documents', 'doc_type'))
+    migrated = False
+
+    for column, table, target in legacy:
+        if column not in cols:
+            continue
+        rows = conn.exec_driver_sql(
+            f"SELECT id, {column} FROM claim_validation_reports "
+            f"WHERE {column} IS NOT NULL AND {column} != ''").fetchall()
+        for report_id, csv_value in rows:
+            for value in csv_value.split(','):
+                value = value.strip()
+                if value:
+                    conn.exec_driver_sql(
+                        f'INSERT OR IGNORE INTO {table} (report_id, {target}) '
+                        'VALUES (?, ?)', (report_id, value))
+        _drop_column(conn, 'claim_validation_reports', column)
+        migrated = True
+
+    if migrated:
+        print("✓ Migrated claim report CSV columns to child tables")
+
+
+def _fail_stranded_uploads(conn):
+    """Mark uploads stuck in 'processing' as failed
+
+    Extraction runs in an in-process worker pool, so jobs queued at the
+    moment of a restart lose their worker and their rows would sit at
+    'processing' forever, with the client poller spinning on them.
+    Nothing can still be processing at boot, so the sweep is safe.
+    """
+    if 'status' not in _table_columns(conn, 'bill_uploads'):
+        return
+    result = conn.exec_driver_sql(
+        "UPDATE bill_uploads SET status = 'failed', extraction_result = ? "
+        "WHERE status = 'processing'",
+        (_json_dumps({
+            'success': False,
+            'error': 'Extraction was interrupted by a server restart. '
+                     'Please upload the file again.'
+        }),))
+    if result.rowcount:
+        print(f"✓ Failed {result.rowcount} extraction(s) stranded by restart")
+
+
+def _migrate_legacy_schema():
+    """Bring a pre-existing SQLite database up to the current schema"""
+    if db.engine.url.get_backend_name() != 'sqlite':
+        return
+    with db.engine.begin() as conn:
+        _migrate_claims_ml_columns(conn)
+        _migrate_bill_uploads_async_columns(conn)
+        _migrate_report_csv_columns(conn)
+        _fail_stranded_uploads(conn)
 
 
 def create_tables(app):
     """Create all database tables"""
     with app.app_context():
         db.create_all()
+        _migrate_legacy_schema()
         print("✓ Database tables created successfully")
@@ -0,0 +1 @@
+"""Shared service-layer helpers for the billing app"""
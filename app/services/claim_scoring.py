@@ -0,0 +1,68 @@
+"""
+Claim Scoring Service
+Shared fraud-probability backfill logic (batched ML call, single commit)
+"""
+
+import pandas as pd
+
+from app.models import db
+
+
+def ensure_scored(claims, ml_models):
+    """
+    Fill in missing fraud probabilities for the given claims.
+
+    Status shortcuts (Manual Review / Approved) are applied in Python;
+    everything else goes through ONE batched ml_models.predict call.
+    Commits once for the whole batch. Returns the number of claims scored.
+    """
+    unscored = [c for c in claims
+                if c.fraud_probability is None or c.fraud_probability == 0.0]
+    if not unscored:
+        return 0
+
+    needs_ml = []
+    for claim in unscored:
+        if claim.validation_status == 'Manual Review':
+            # Manual Review claims: 25% fraud risk
+            claim.fraud_probability = 0.25
+            claim.confidence_score = 0.85
+        elif claim.validation_status == 'Approved':
+            # Approved claims: fixed 12.5% fraud risk (midpoint of the old
+            # 10-15% random range; deterministic so re-runs are idempotent)
+            claim.fraud_probability = 0.125
+            claim.confidence_score = 0.90
+        else:
+            # Calculate fraud probability using ML model for other statuses
+            needs_ml.append(claim)
+
+    if needs_ml:
+        try:
+            df_temp = pd.DataFrame([{
+                'age': claim.age,
+                'diagnosis_code': claim.diagnosis_code,
+                'procedure_code': claim.procedure_code,
+                'treatment_cost': claim.treatment_cost,
+                'insurance_coverage_limit': claim.insurance_coverage_limit,
+            } for claim in needs_ml])
+            X, _ = ml_models.prepare_data(df_temp)
+            ml_pred = ml_models.predict(X)
+
+            for idx, claim in enumerate(needs_ml):
+                fraud_prob = float(ml_pred['ensemble_proba'][idx])
+                claim.fraud_probability = fraud_prob
+                claim.confidence_score = fraud_prob
+
+                claim.lr_prob = float(ml_pred['lr_proba'][idx])
+                claim.rf_prob = float(ml_pred['rf_proba'][idx])
+                claim.iso_pred = int(ml_pred['iso_pred'][idx])
+                claim.ensemble_proba = fraud_prob
+        except Exception:
+            # If ML calculation fails, assign a small default probability
+            for claim in needs_ml:
+                claim.fraud_probability = 0.05
+                claim.confidence_score = 0.50
+
+    # Single commit for the whole batch
+    db.session.commit()
+    return len(unscored)
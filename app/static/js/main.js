@@ -341,75 +341,112 @@ function handleFileUpload(file) {
     const formData = new FormData();
     formData.append('bill_file', file);
     
-    // Upload file
+    // Upload file; extraction runs server-side in the background, so we
+    // poll the status endpoint until it finishes
     fetch('/api/upload-bill', {
         method: 'POST',
         body: formData
     })
     .then(response => response.json())
     .then(data => {
-        uploadLoading.style.display = 'none';
-        
         if (!data.success) {
-            uploadArea.style.display = 'block';
-            const errorHtml = `
-                <div class="alert alert-danger alert-dismissible fade show" role="alert">
-                    <i class="bi bi-exclamation-circle"></i> <strong>Upload Failed:</strong> ${data.error}
-                    <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                </div>
-            `;
-            uploadStatus.innerHTML = errorHtml;
-            showToast('Failed to extract PDF: ' + data.error, 'error');
+            showExtractionError(data.error);
             return;
         }
-        
-        // Success - fill form with extracted data
-        const fields = data.extracted_fields;
-        const extractedForm = document.getElementById('extractedForm');
-        
-        if (extractedForm) {
-            // Fill in fields
-            if (fields.patient_id) document.getElementById('ex_patient_id').value = fields.patient_id;
-            if (fields.age) document.getElementById('ex_age').value = fields.age;
-            if (fields.gender) document.getElementById('ex_gender').value = fields.gender;
-            if (fields.diagnosis_code) document.getElementById('ex_diagnosis').value = fields.diagnosis_code;
-            if (fields.procedure_code) document.getElementById('ex_procedure').value = fields.procedure_code;
-            if (fields.treatment_cost) document.getElementById('ex_cost').value = fields.treatment_cost.toFixed(2);
-            if (fields.insurance_coverage_limit) document.getElementById('ex_coverage_limit').value = fields.insurance_coverage_limit.toFixed(2);
-            if (fields.hospital_id) document.getElementById('ex_hospital_id').value = fields.hospital_id || 'H0001';
-            
-            // Show success message
-            const successHtml = `
-                <div class="alert alert-success alert-dismissible fade show" role="alert">
-                    <i class="bi bi-check-circle"></i> <strong>Success!</strong> ${data.message}
-                    <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
-                </div>
-            `;
-            uploadStatus.innerHTML = successHtml;
-            
-            // Show extracted form
-            extractedForm.style.display = 'block';
-            
-            // Scroll to form
-            setTimeout(() => {
-                extractedForm.scrollIntoView({ behavior: 'smooth', block: 'start' });
-            }, 300);
+        pollExtractionStatus(data.upload_id);
+    })
+    .catch(error => {
+        showExtractionError(error.message);
+        showToast('Error uploading file: ' + error.message, 'error');
+    });
+}
+
+// Give OCR of a large multi-page bill ample time, but never poll forever:
+// a stranded row (server restart, lost job) must surface as an error
+const MAX_EXTRACTION_POLLS = 180;  // ~3 minutes at 1s intervals
+
+function pollExtractionStatus(uploadId, attempt = 0) {
+    fetch(`/api/bill-upload/${uploadId}/status`)
+    .then(response => response.json())
+    .then(data => {
+        if (data.status === 'processing') {
+            if (attempt >= MAX_EXTRACTION_POLLS) {
+                showExtractionError('Extraction is taking too long. Please try again or enter the fields manually.');
+                showToast('Extraction timed out', 'error');
+                return;
+            }
+            setTimeout(() => pollExtractionStatus(uploadId, attempt + 1), 1000);
+            return;
+        }
+
+        if (data.status !== 'done' || !data.success) {
+            showExtractionError(data.error || 'Failed to extract PDF');
+            showToast('Failed to extract PDF: ' + (data.error || 'unknown error'), 'error');
+            return;
         }
+
+        applyExtractedFields(data);
     })
     .catch(error => {
-        uploadLoading.style.display = 'none';
-        uploadArea.style.display = 'block';
-        
-        const errorHtml = `
-            <div class="alert alert-danger alert-dismissible fade show" role="alert">
-                <i class="bi bi-exclamation-circle"></i> <strong>Error:</strong> ${error.message}
+        showExtractionError(error.message);
+        showToast('Error checking extraction status: ' + error.message, 'error');
+    });
+}
+
+function showExtractionError(message) {
+    const uploadArea = document.getElementById('uploadArea');
+    const uploadLoading = document.getElementById('uploadLoading');
+    const uploadStatus = document.getElementById('uploadStatus');
+
+    uploadLoading.style.display = 'none';
+    uploadArea.style.display = 'block';
+    const errorHtml = `
+        <div class="alert alert-danger alert-dismissible fade show" role="alert">
+            <i class="bi bi-exclamation-circle"></i> <strong>Upload Failed:</strong> ${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        </div>
+    `;
+    uploadStatus.innerHTML = errorHtml;
+}
+
+function applyExtractedFields(data) {
+    const uploadLoading = document.getElementById('uploadLoading');
+    const uploadStatus = document.getElementById('uploadStatus');
+
+    uploadLoading.style.display = 'none';
+
+    // Success - fill form with extracted data
+    const fields = data.extracted_fields;
+    const extractedForm = document.getElementById('extractedForm');
+
+    if (extractedForm) {
+        // Fill in fields
+        if (fields.patient_id) document.getElementById('ex_patient_id').value = fields.patient_id;
+        if (fields.age) document.getElementById('ex_age').value = fields.age;
+        if (fields.gender) document.getElementById('ex_gender').value = fields.gender;
+        if (fields.diagnosis_code) document.getElementById('ex_diagnosis').value = fields.diagnosis_code;
+        if (fields.procedure_code) document.getElementById('ex_procedure').value = fields.procedure_code;
+        if (fields.treatment_cost) document.getElementById('ex_cost').value = fields.treatment_cost.toFixed(2);
+        if (fields.insurance_coverage_limit) document.getElementById('ex_coverage_limit').value = fields.insurance_coverage_limit.toFixed(2);
+        if (fields.hospital_id) document.getElementById('ex_hospital_id').value = fields.hospital_id || 'H0001';
+
+        // Show success message
+        const successHtml = `
+            <div class="alert alert-success alert-dismissible fade show" role="alert">
+                <i class="bi bi-check-circle"></i> <strong>Success!</strong> ${data.message}
                 <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
             </div>
         `;
-        uploadStatus.innerHTML = errorHtml;
-        
-        showToast('Error uploading file: ' + error.message, 'error');
-    });
+        uploadStatus.innerHTML = successHtml;
+
+        // Show extracted form
+        extractedForm.style.display = 'block';
+
+        // Scroll to form
+        setTimeout(() => {
+            extractedForm.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        }, 300);
+    }
 }
 
 function resetUpload() {
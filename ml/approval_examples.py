@@ -3,6 +3,12 @@ Dynamic Approval Examples Data Module
 Converts approval examples to structured data for dashboard integration
 """
 
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
 # Approval Examples Data - Structured for Dynamic Dashboard
 APPROVAL_EXAMPLES = [
     {
@@ -191,6 +197,14 @@ APPROVAL_EXAMPLES = [
 ]
 
 
+# Column-oriented view of the examples; filters run as vectorized masks
+# instead of repeated list-comprehension passes over the dicts
+_DF = pd.DataFrame(APPROVAL_EXAMPLES)
+
+# Read-only id -> example mapping for O(1) lookups
+_BY_ID = MappingProxyType({e["id"]: e for e in APPROVAL_EXAMPLES})
+
+
 def get_all_examples():
     """Get all approval examples"""
     return APPROVAL_EXAMPLES
@@ -198,14 +212,12 @@ def get_all_examples():
 
 def get_example_by_id(claim_id):
     """Get specific approval example by ID"""
-    for example in APPROVAL_EXAMPLES:
-        if example["id"] == claim_id:
-            return example
-    return None
+    return _BY_ID.get(claim_id)
 
 
+@lru_cache(maxsize=1)
 def get_examples_summary():
-    """Get summary statistics of all examples"""
+    """Get summary statistics of all examples (static data, computed once)"""
     if not APPROVAL_EXAMPLES:
         return {}
     
@@ -227,18 +239,20 @@ def get_examples_summary():
 
 def filter_examples(status=None, fraud_risk_max=None, min_amount=None, max_amount=None):
     """Filter examples based on criteria"""
-    results = APPROVAL_EXAMPLES.copy()
-    
+    mask = np.ones(len(_DF), dtype=bool)
+
     if status:
-        results = [e for e in results if e["status"] == status.upper()]
-    
+        mask &= (_DF["status"].values == status.upper())
+
     if fraud_risk_max is not None:
-        results = [e for e in results if e["fraud_risk_score"] <= fraud_risk_max]
-    
+        mask &= (_DF["fraud_risk_score"].values <= fraud_risk_max)
+
     if min_amount is not None:
-        results = [e for e in results if e["treatment_cost"] >= min_amount]
-    
+        mask &= (_DF["treatment_cost"].values >= min_amount)
+
     if max_amount is not None:
-        results = [e for e in results if e["treatment_cost"] <= max_amount]
-    
-    return results
+        mask &= (_DF["treatment_cost"].values <= max_amount)
+
+    if mask.all():
+        return APPROVAL_EXAMPLES.copy()
+    return [APPROVAL_EXAMPLES[i] for i in np.flatnonzero(mask)]
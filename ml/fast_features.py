@@ -0,0 +1,90 @@
+"""
+Fast Single-Row Feature Engineering for Inference
+Bypasses pandas DataFrame construction on the API hot path.
+
+Mirrors the numeric transforms in MedicalBillingMLModels.prepare_data.
+Uses Numba JIT compilation when available (compile cost paid once,
+cached on disk); falls back to plain NumPy otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op decorator so the module works without Numba installed"""
+        if args and callable(args[0]):
+            return args[0]
+
+        def wrap(func):
+            return func
+        return wrap
+
+
+@njit(cache=True)
+def _derive_features(age, cost, coverage, gender_idx, hospital_idx, cost_exceeds):
+    """Build the 12-element feature vector used by the trained models"""
+    features = np.empty(12, dtype=np.float64)
+    features[0] = age
+    features[1] = cost
+    features[2] = coverage
+    features[3] = gender_idx
+    features[4] = hospital_idx
+    features[5] = cost_exceeds
+
+    # Derived features (must match prepare_data exactly)
+    features[6] = cost / (coverage + 1.0)  # cost_coverage_ratio
+
+    # age_group mirrors pd.cut(age, bins=[0, 30, 50, 70, 100])
+    if age <= 30:
+        features[7] = 0.0
+    elif age <= 50:
+        features[7] = 1.0
+    elif age <= 70:
+        features[7] = 2.0
+    else:
+        features[7] = 3.0
+
+    features[8] = cost * cost  # cost_squared
+    features[9] = (coverage - cost) / (coverage + 1.0)  # coverage_utilization
+    features[10] = age * cost / 100000.0  # age_cost_interaction
+    features[11] = cost / 1000.0  # cost_polynomial
+
+    return features
+
+
+def encode_label(label_encoders, column, value):
+    """Map a categorical value through a fitted LabelEncoder (unseen -> 0)"""
+    encoder = label_encoders.get(column)
+    if encoder is None:
+        return 0
+    try:
+        return int(encoder.transform([value])[0])
+    except (ValueError, KeyError):
+        return 0
+
+
+def build_row(age, treatment_cost, coverage_limit, gender_idx=0, hospital_idx=0):
+    """
+    Build a (1, n_features) array for a single claim from raw scalars.
+
+    Args:
+        age: Patient age
+        treatment_cost: Claimed treatment cost
+        coverage_limit: Insurance coverage limit
+        gender_idx: Label-encoded gender (see encode_label)
+        hospital_idx: Label-encoded hospital ID (see encode_label)
+
+    Returns:
+        2D numpy array ready for MedicalBillingMLModels.predict
+    """
+    cost_exceeds = 1.0 if treatment_cost > coverage_limit else 0.0
+    row = _derive_features(
+        float(age), float(treatment_cost), float(coverage_limit),
+        float(gender_idx), float(hospital_idx), cost_exceeds
+    )
+    return row.reshape(1, -1)
@@ -3,13 +3,80 @@ PDF Bill Extractor
 Extracts text and relevant fields from medical bills (PDF)
 """
 
+import os
+
+# Keep each tesseract process single-threaded; parallelism comes from
+# running one process per page below — Tesseract's internal OpenMP
+# threading is slower than that
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+import hashlib
+import json
+
 import pytesseract
 from pdf2image import convert_from_path
 import re
-import os
 from PIL import Image
 import tempfile
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+# OCR results keyed by a hash of the page pixels: re-uploaded bills and
+# shared boilerplate pages skip Tesseract entirely on a hit. Hashing a
+# page costs ~1-3 ms against 50-260 ms for OCR; blake2b is the fastest
+# of the stdlib digests. Oldest entry is evicted past the cap.
+_OCR_CACHE_MAX = 512
+_ocr_cache = {}
+
+# Threshold table for Image.point(): pixels below 180 go black, the
+# rest white. A prebuilt table avoids a Python callback per pixel.
+_BINARIZE_TABLE = [0] * 180 + [255] * 76
+
+
+def preprocess_page(image):
+    """Grayscale and binarize a page image before OCR.
+
+    Tesseract cost scales with input bytes; a 1-bit page carries ~8x
+    less data than the RGB render with no accuracy loss on printed
+    bills, and binarization sharpens glyph edges for the recognizer.
+    """
+    return image.convert('L').point(_BINARIZE_TABLE, '1')
+
+
+# Leading literal run of a pattern (letters and spaces before any regex
+# metacharacter), used as a cheap substring prefilter
+_ANCHOR_RE = re.compile(r'[A-Za-z][A-Za-z ]*')
+
+
+def _pattern_anchor(pattern):
+    """Lowercased literal prefix of a pattern, '' when it has none.
+
+    When the anchor is absent from the (lowercased) text, the pattern
+    cannot match and the regex scan can be skipped outright — a C-level
+    substring check replaces a full NFA walk for the common
+    non-matching case.
+    """
+    match = _ANCHOR_RE.match(pattern)
+    return match.group().strip().lower() if match else ''
+
+
+# LSTM engine only (--oem 1) skips the slower legacy pass of the
+# default combined mode, and single-block segmentation (--psm 6) skips
+# auto layout analysis, which structured bills don't need
+_TESSERACT_CONFIG = '--oem 1 --psm 6'
+
+
+def _ocr_page_cached(image):
+    """OCR a PIL page image, serving repeats from the in-process cache"""
+    key = hashlib.blake2b(image.tobytes(), digest_size=16).digest()
+    text = _ocr_cache.get(key)
+    if text is None:
+        text = pytesseract.image_to_string(image, lang='eng',
+                                           config=_TESSERACT_CONFIG)
+        if len(_ocr_cache) >= _OCR_CACHE_MAX:
+            _ocr_cache.pop(next(iter(_ocr_cache)))
+        _ocr_cache[key] = text
+    return text
 
 
 def configure_poppler():
@@ -26,7 +93,22 @@ def configure_poppler():
         '/usr/local/bin',  # macOS
         '/opt/homebrew/bin',  # macOS M1/M2
     ]
-    
+
+    # Paths discovered by setup_poppler.py are recorded in a sidecar
+    # JSON next to this module (so the source never gets rewritten);
+    # they take priority over the built-in guesses. A malformed or
+    # hand-edited sidecar must never break import: anything that isn't
+    # a list of paths is ignored outright.
+    sidecar = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           'poppler_paths.json')
+    try:
+        with open(sidecar) as f:
+            sidecar_paths = json.load(f)
+        if isinstance(sidecar_paths, list):
+            poppler_paths = sidecar_paths + poppler_paths
+    except (OSError, ValueError):
+        pass
+
     # Try to find Poppler in PATH via system
     for path in poppler_paths:
         if os.path.exists(path):
@@ -73,6 +155,8 @@ def configure_tesseract():
     try:
         result = pytesseract.get_tesseract_version()
         print(f"Tesseract accessible via PATH: {result}")
+        print("Tip: installing eng.traineddata from tessdata_fast makes "
+              "the LSTM engine (--oem 1) noticeably faster.")
         return True
     except Exception as e:
         print(f"Warning: Could not find Tesseract: {e}")
@@ -103,6 +187,21 @@ def check_poppler():
     return False
 
 
+# The configure_* probes cost a dozen os.path.exists calls; run them
+# once per process rather than on every PDFBillExtractor construction
+_configured = False
+
+
+def _ensure_configured():
+    """Configure poppler and tesseract paths on the first call only"""
+    global _configured
+    if _configured:
+        return
+    configure_poppler()
+    configure_tesseract()
+    _configured = True
+
+
 # Configure on module load
 try:
     configure_tesseract()
@@ -118,12 +217,16 @@ class PDFBillExtractor:
     """Extract information from PDF medical bills"""
     
     def __init__(self):
-        # Configure Poppler and Tesseract on initialization
-        configure_poppler()
-        configure_tesseract()
+        # Configure Poppler and Tesseract on first initialization
+        _ensure_configured()
+
+        # Compiled once: validates captured diagnosis codes without a
+        # re-cache lookup per candidate (letter + 2 digits, or 3-8
+        # uppercase alphanumerics)
+        self._icd_re = re.compile(r'[A-Z]\d{2,}|[A-Z0-9]{3,8}')
         
         # Common cost patterns (amounts in dollars) - ENHANCED
-        self.cost_patterns = [
+        self.cost_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Treatment Cost\s*\(\$\)[\s:]*(\d[,\d]*\.?\d*)',  # Treatment Cost ($): 4500
             r'Total Cost[:\s]*\$?(\d[,\d]*\.?\d*)',
             r'Total Due[:\s]*\$?(\d[,\d]*\.?\d*)',
@@ -136,20 +239,20 @@ class PDFBillExtractor:
             r'Service Fee[:\s]*\$?(\d[,\d]*\.?\d*)',
             r'\$(\d[,\d]*\.?\d*)\s*(?:total|due|amount|charge)',
             r'Net\s+(?:Amount)?[:\s]*\$?(\d[,\d]*\.?\d*)',
-        ]
+        )]
         
         # Common diagnosis code patterns (ICD-10 or numeric codes) - ENHANCED
-        self.diagnosis_patterns = [
+        self.diagnosis_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Diagnosis Code\s*\(ICD\)[\s:]*([A-Z0-9]{1,8}?)(?:\s|—|$)',  # Match code before description
             r'Diagnosis\s*(?:Code)?[\s:]*([A-Z0-9]{1,8}?)(?:\s|—|:|$)',
             r'ICD[- ]?(?:10)?[\s:]*([A-Z0-9]{1,8})',
             r'DX[\s:]*([A-Z0-9]{1,8})',
             r'Condition[\s:]*\(([A-Z0-9]{1,8})\)',
             r'Primary\s+Diagnosis[\s:]*([A-Z0-9]{1,8})',
-        ]
+        )]
         
         # Common procedure code patterns (CPT) - ENHANCED
-        self.procedure_patterns = [
+        self.procedure_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'(?:Procedure|CPT|Code)[\s\(\w\)]*[\s:]*(\d{4,5})',  # Match CPT: 93000 or similar
             r'Procedure Code[\s\(\w\)]*[\s:]*(\d{4,5})',  # Procedure Code (CPT): 93000
             r'CPT Code[\s:]*(\d{4,5})',
@@ -157,10 +260,10 @@ class PDFBillExtractor:
             r'Procedural Code[\s:]*(\d{4,5})',
             r'Medical Code[\s:]*(\d{4,5})',
             r'Service ID[\s:]*(\d{4,5})',
-        ]
+        )]
         
         # Coverage limit patterns - ENHANCED
-        self.coverage_patterns = [
+        self.coverage_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Insurance Coverage Limit\s*\(\$\)[\s:]*(\d[,\d]*\.?\d*)',  # Insurance Coverage Limit ($): 2000
             r'(?:Coverage|Benefit)[\s]*Limit[\s:]*\$?(\d[,\d]*\.?\d*)',
             r'Insurance Coverage[\s:]*\$?(\d[,\d]*\.?\d*)',
@@ -170,51 +273,112 @@ class PDFBillExtractor:
             r'Plan Maximum[\s:]*\$?(\d[,\d]*\.?\d*)',
             r'Annual Limit[\s:]*\$?(\d[,\d]*\.?\d*)',
             r'Deductible[\s:]*\$?(\d[,\d]*\.?\d*)',
-        ]
+        )]
         
         # Patient ID patterns - ENHANCED
-        self.patient_id_patterns = [
+        self.patient_id_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'(?:Patient|Member)\s*ID[\s:]*([A-Z0-9]{4,12})',
             r'Patient Number[\s:]*([A-Z0-9]{4,12})',
             r'ID[\s:]*([A-Z0-9]{4,12})',
             r'Patient Ref[\s:]*([A-Z0-9]{4,12})',
             r'Account[\s]*Number[\s:]*([A-Z0-9]{4,12})',
-        ]
+        )]
         
         # Age patterns - ENHANCED
-        self.age_patterns = [
+        self.age_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Age[\s:]*(\d{1,3})',
             r'Patient Age[\s:]*(\d{1,3})',
             r'DOB.*?(\d{1,3})\s*years?',
             r'Age\s+\(years\)[\s:]*(\d{1,3})',
             r'(\d{1,3})\s*(?:years?|yrs?)\s+old',
-        ]
+        )]
         
         # Gender patterns - ENHANCED
-        self.gender_patterns = [
+        self.gender_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Gender[\s:]*([MFX])',
             r'Sex[\s:]*([MFX])',
             r'Patient Sex[\s:]*([MFX])',
             r'Gender[\s:]*\(([MF])\)',
             r'(?:Male|Female|M|F)',
-        ]
+        )]
         
         # Hospital ID patterns - ENHANCED
-        self.hospital_patterns = [
+        self.hospital_patterns = [(_pattern_anchor(p), re.compile(p, re.IGNORECASE)) for p in (
             r'Hospital\s*ID[\s:]*([A-Z0-9]{3,8})',
             r'Facility[\s]*ID[\s:]*([A-Z0-9]{3,8})',
             r'Provider[\s]*ID[\s:]*([A-Z0-9]{3,8})',
             r'Hospital[\s]*Code[\s:]*([A-Z0-9]{3,8})',
             r'Healthcare Facility[\s:]*([A-Z0-9]{3,8})',
-        ]
+        )]
+
+        self._field_pattern_lists = {
+            'patient_id': self.patient_id_patterns,
+            'age': self.age_patterns,
+            'gender': self.gender_patterns,
+            'diagnosis_code': self.diagnosis_patterns,
+            'procedure_code': self.procedure_patterns,
+            'treatment_cost': self.cost_patterns,
+            'insurance_coverage_limit': self.coverage_patterns,
+            'hospital_id': self.hospital_patterns,
+        }
+
+        # Field-level view of the anchors: when every pattern of a field
+        # is anchored and none of the anchors occur in the document, the
+        # whole fallback cascade for that field can be skipped. Fields
+        # with an unanchored pattern must always scan.
+        self._field_anchors = {
+            name: tuple(anchor for anchor, _pat in patterns if anchor)
+            for name, patterns in self._field_pattern_lists.items()
+        }
+        self._field_always_scans = {
+            name: any(not anchor for anchor, _pat in patterns)
+            for name, patterns in self._field_pattern_lists.items()
+        }
+
+        # Every field pattern fused into one alternation with named
+        # groups, so extract_all_fields resolves all eight fields in a
+        # single pass over the OCR text instead of ~50 full-text scans.
+        # Patterns without a capture group (bare keyword matches) carry
+        # no value and are left out of the combined scan. Each pattern
+        # keeps its index within its field's cascade so the scan can
+        # resolve competing hits by the same priority order the
+        # per-field extractors use. The whole alternation sits inside a
+        # zero-width lookahead: a plain alternation consumes its match,
+        # so one branch's hit could swallow the text where another
+        # branch (possibly higher priority, possibly another field's)
+        # starts, hiding it from the scan entirely.
+        parts = []
+        self._tag_fields = {}
+        self._field_top_priority = {}
+        for field, patterns in self._field_pattern_lists.items():
+            for i, (_anchor, pat) in enumerate(patterns):
+                if pat.groups < 1:
+                    continue
+                tag = '%s_%d' % (field, i)
+                parts.append('(?P<%s>%s)' % (tag, pat.pattern))
+                self._field_top_priority.setdefault(field, i)
+        self._combined = re.compile('(?=%s)' % '|'.join(parts), re.IGNORECASE)
+        # Each tag's captured value is the first group inside it
+        for field, patterns in self._field_pattern_lists.items():
+            for i, (_anchor, pat) in enumerate(patterns):
+                if pat.groups < 1:
+                    continue
+                tag = '%s_%d' % (field, i)
+                self._tag_fields[tag] = (field, i,
+                                         self._combined.groupindex[tag] + 1)
     
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_text_from_pdf(self, pdf_path, early_stop=None):
         """
         Extract text from PDF file using OCR
         
         Args:
             pdf_path: Path to PDF file
-            
+            early_stop: Optional callable given the text accumulated so
+                far after each page completes; returning True cancels
+                the pages still queued for OCR and returns early with
+                the partial text (used when every field is already
+                resolved, e.g. a superbill with all data on page 1)
+
         Returns:
             Extracted text as string
         """
@@ -226,35 +390,73 @@ class PDFBillExtractor:
             if not os.access(pdf_path, os.R_OK):
                 raise PermissionError(f"PDF file is not readable: {pdf_path}")
             
-            # Convert PDF pages to images
-            try:
-                images = convert_from_path(pdf_path)
-            except Exception as e:
-                error_msg = str(e)
-                if 'poppler' in error_msg.lower() or 'page count' in error_msg.lower():
-                    raise RuntimeError(
-                        f"Poppler is not installed or not in PATH. "
-                        f"Poppler is required for PDF conversion. "
-                        f"Install from: https://github.com/oschwartz10612/poppler-windows/releases/ "
-                        f"(Windows) or 'apt-get install poppler-utils' (Linux) or 'brew install poppler' (macOS). "
-                        f"Original error: {error_msg}"
-                    )
-                else:
-                    raise RuntimeError(f"Failed to convert PDF to images: {error_msg}. PDF may be corrupted or invalid.")
-            
-            if not images:
-                raise ValueError("PDF has no pages or could not be read")
-            
-            extracted_text = ""
-            for page_num, image in enumerate(images, 1):
+            # Convert PDF pages to images. pdftoppm is single-threaded by
+            # default, so fan out across cores; output_folder is required
+            # for the fan-out to take effect in some pdf2image builds and
+            # keeps pages streaming from disk instead of piling up as PIL
+            # objects. 200 DPI is plenty for printed bills.
+            with tempfile.TemporaryDirectory() as tmpdir:
                 try:
-                    # Use OCR to extract text
-                    text = pytesseract.image_to_string(image)
-                    if text.strip():  # Only add if text was actually extracted
-                        extracted_text += text + "\n"
+                    # paths_only defers decoding: pages exist as files
+                    # until a worker opens one, so peak RSS is bounded
+                    # by the pool width rather than the page count
+                    page_paths = convert_from_path(
+                        pdf_path, dpi=200,
+                        thread_count=max(1, (os.cpu_count() or 2) - 1),
+                        output_folder=tmpdir, fmt='png', paths_only=True)
                 except Exception as e:
-                    print(f"Warning: Error extracting text from page {page_num}: {e}")
-                    continue
+                    error_msg = str(e)
+                    if 'poppler' in error_msg.lower() or 'page count' in error_msg.lower():
+                        raise RuntimeError(
+                            f"Poppler is not installed or not in PATH. "
+                            f"Poppler is required for PDF conversion. "
+                            f"Install from: https://github.com/oschwartz10612/poppler-windows/releases/ "
+                            f"(Windows) or 'apt-get install poppler-utils' (Linux) or 'brew install poppler' (macOS). "
+                            f"Original error: {error_msg}"
+                        )
+                    else:
+                        raise RuntimeError(f"Failed to convert PDF to images: {error_msg}. PDF may be corrupted or invalid.")
+
+                if not page_paths:
+                    raise ValueError("PDF has no pages or could not be read")
+
+                def _ocr_page(numbered_path):
+                    page_num, path = numbered_path
+                    try:
+                        # Decode, binarize, and release the page image
+                        # before OCR (cached by page hash; the 1-bit
+                        # image also hashes ~8x faster)
+                        with Image.open(path) as image:
+                            page = preprocess_page(image)
+                        return _ocr_page_cached(page)
+                    except Exception as e:
+                        print(f"Warning: Error extracting text from page {page_num}: {e}")
+                        return ""
+
+                # OCR pages in parallel: image_to_string waits on a
+                # tesseract subprocess, so threads scale with cores.
+                # Pages are consumed as they complete so an early_stop
+                # callback can cancel the still-queued pages once it has
+                # seen enough text.
+                texts = {}
+                with ThreadPoolExecutor(
+                        max_workers=min(len(page_paths), os.cpu_count() or 4)) as ex:
+                    futures = {
+                        ex.submit(_ocr_page, (num, path)): num
+                        for num, path in enumerate(page_paths, 1)
+                    }
+                    for future in as_completed(futures):
+                        texts[futures[future]] = future.result()
+                        if early_stop is not None and early_stop("".join(
+                                text + "\n"
+                                for _num, text in sorted(texts.items())
+                                if text.strip())):
+                            for pending in futures:
+                                pending.cancel()
+                            break
+                extracted_text = "".join(
+                    text + "\n"
+                    for _num, text in sorted(texts.items()) if text.strip())
             
             # Check if any text was extracted
             if not extracted_text.strip():
@@ -284,141 +486,224 @@ class PDFBillExtractor:
             print(f"Unexpected error extracting PDF: {e}")
             return ""
     
-    def extract_cost(self, text):
+    def extract_cost(self, text, text_l=None):
         """Extract treatment cost from text with improved accuracy"""
-        for pattern in self.cost_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.cost_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        # Check if pattern has capture groups
-                        amount_str = match.group(1).replace(',', '')
-                        amount = float(amount_str)
-                        # Sanity check: medical bills are typically $50-$100,000
-                        if 50 <= amount <= 100000:
-                            return amount
-                    except (IndexError, ValueError):
-                        pass
-            except:
-                pass
+                amount = float(match.group(1).replace(',', ''))
+            except (IndexError, ValueError):
+                continue
+            # Sanity check: medical bills are typically $50-$100,000
+            if 50 <= amount <= 100000:
+                return amount
         return None
     
-    def extract_diagnosis_code(self, text):
+    def extract_diagnosis_code(self, text, text_l=None):
         """Extract diagnosis (ICD-10) code from text with improved matching"""
-        for pattern in self.diagnosis_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.diagnosis_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        code = match.group(1).upper().strip()
-                        # Valid ICD-10 format: Letter + 2+ digits
-                        if re.match(r'[A-Z]\d{2,}', code) or re.match(r'[A-Z0-9]{3,8}', code):
-                            return code[:8]  # Limit to 8 chars
-                    except (IndexError, AttributeError):
-                        pass
-            except:
-                pass
+                code = match.group(1).upper().strip()
+            except IndexError:
+                continue
+            # Valid ICD-10 format: Letter + 2+ digits
+            if self._icd_re.match(code):
+                return code[:8]  # Limit to 8 chars
         return None
     
-    def extract_procedure_code(self, text):
+    def extract_procedure_code(self, text, text_l=None):
         """Extract procedure (CPT) code from text with improved matching"""
-        for pattern in self.procedure_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.procedure_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        code = match.group(1)
-                        # Valid CPT format: 4-5 digits
-                        if re.match(r'\d{4,5}', code):
-                            return code
-                    except (IndexError, AttributeError):
-                        pass
-            except:
-                pass
+                code = match.group(1)
+            except IndexError:
+                continue
+            # Valid CPT format: 4-5 digits (captures are digit-only, so
+            # a C-level isdigit/length check replaces the regex)
+            if code and code.isdigit() and len(code) >= 4:
+                return code
         return None
     
-    def extract_coverage_limit(self, text):
+    def extract_coverage_limit(self, text, text_l=None):
         """Extract insurance coverage limit from text"""
-        for pattern in self.coverage_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.coverage_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        amount_str = match.group(1).replace(',', '')
-                        amount = float(amount_str)
-                        # Sanity check
-                        if 100 <= amount <= 1000000:
-                            return amount
-                    except (IndexError, ValueError):
-                        pass
-            except:
-                pass
+                amount = float(match.group(1).replace(',', ''))
+            except (IndexError, ValueError):
+                continue
+            # Sanity check
+            if 100 <= amount <= 1000000:
+                return amount
         return None
     
-    def extract_patient_id(self, text):
+    def extract_patient_id(self, text, text_l=None):
         """Extract patient ID from text"""
-        for pattern in self.patient_id_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.patient_id_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        patient_id = match.group(1)
-                        if len(patient_id) >= 4:
-                            return patient_id
-                    except (IndexError, AttributeError):
-                        pass
-            except:
-                pass
+                patient_id = match.group(1)
+            except IndexError:
+                continue
+            if patient_id and len(patient_id) >= 4:
+                return patient_id
         return None
     
-    def extract_age(self, text):
+    def extract_age(self, text, text_l=None):
         """Extract patient age from text"""
-        for pattern in self.age_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.age_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        age = int(match.group(1))
-                        # Sanity check
-                        if 0 < age < 150:
-                            return age
-                    except (IndexError, ValueError):
-                        pass
-            except:
-                pass
+                age = int(match.group(1))
+            except (IndexError, ValueError, TypeError):
+                continue
+            # Sanity check
+            if 0 < age < 150:
+                return age
         return None
     
-    def extract_gender(self, text):
+    def extract_gender(self, text, text_l=None):
         """Extract patient gender from text"""
-        for pattern in self.gender_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.gender_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        gender = match.group(1).upper()
-                        if gender in ['M', 'F', 'X']:
-                            return gender
-                    except (IndexError, AttributeError):
-                        pass
-            except:
-                pass
+                gender = match.group(1).upper()
+            except (IndexError, AttributeError):
+                continue
+            if gender in ('M', 'F', 'X'):
+                return gender
         return None
     
-    def extract_hospital_id(self, text):
+    def extract_hospital_id(self, text, text_l=None):
         """Extract hospital ID from text"""
-        for pattern in self.hospital_patterns:
+        if text_l is None:
+            text_l = text.lower()
+        for anchor, pattern in self.hospital_patterns:
+            if anchor and anchor not in text_l:
+                continue
+            match = pattern.search(text)
+            if not match:
+                continue
             try:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    try:
-                        hospital_id = match.group(1)
-                        if len(hospital_id) >= 3:
-                            return hospital_id
-                    except (IndexError, AttributeError):
-                        pass
-            except:
-                pass
+                hospital_id = match.group(1)
+            except IndexError:
+                continue
+            if hospital_id and len(hospital_id) >= 3:
+                return hospital_id
         return None
+
+    def _accept_field(self, field, raw):
+        """Convert/validate a captured value for the combined scan.
+
+        Applies the same conversions and sanity checks as the per-field
+        extractors; returns None when the candidate fails them.
+        """
+        try:
+            if field == 'treatment_cost':
+                amount = float(raw.replace(',', ''))
+                return amount if 50 <= amount <= 100000 else None
+            if field == 'insurance_coverage_limit':
+                amount = float(raw.replace(',', ''))
+                return amount if 100 <= amount <= 1000000 else None
+            if field == 'diagnosis_code':
+                code = raw.upper().strip()
+                return code[:8] if self._icd_re.match(code) else None
+            if field == 'procedure_code':
+                return raw if raw.isdigit() and len(raw) >= 4 else None
+            if field == 'patient_id':
+                return raw if len(raw) >= 4 else None
+            if field == 'age':
+                age = int(raw)
+                return age if 0 < age < 150 else None
+            if field == 'gender':
+                gender = raw.upper()
+                return gender if gender in ['M', 'F', 'X'] else None
+            if field == 'hospital_id':
+                return raw if len(raw) >= 3 else None
+        except (ValueError, AttributeError):
+            return None
+        return None
+
+    def scan_fields(self, text):
+        """Resolve fields in one pass over the text with the combined regex.
+
+        The alternation is wrapped in a lookahead, so matches are
+        zero-width and overlapping hits all stay visible - one field's
+        match can't consume the span where another pattern starts.
+        Competing hits for the same field are resolved by pattern
+        priority - lowest index in the field's cascade wins, earliest
+        match breaking ties - so the fused scan agrees with the
+        per-field extractors instead of letting whichever pattern
+        happens to match first in the text win. Scanning stops early
+        once every field holds a hit from its top-priority pattern;
+        fields the pass misses fall back to the per-field extractors.
+        """
+        best = {}
+        unresolved = set(self._field_top_priority)
+        for match in self._combined.finditer(text):
+            tag = match.lastgroup
+            if tag is None:
+                continue
+            field, priority, group_index = self._tag_fields[tag]
+            current = best.get(field)
+            if current is not None and current[0] <= priority:
+                continue
+            raw = match.group(group_index)
+            if not raw:
+                continue
+            value = self._accept_field(field, raw)
+            if value is None:
+                continue
+            best[field] = (priority, value)
+            if priority == self._field_top_priority[field]:
+                unresolved.discard(field)
+                if not unresolved:
+                    break
+        return {field: value for field, (_priority, value) in best.items()}
     
     def extract_all_fields(self, pdf_path):
         """
@@ -430,9 +715,14 @@ class PDFBillExtractor:
         Returns:
             Dictionary with extracted fields
         """
-        # Extract text from PDF
-        text = self.extract_text_from_pdf(pdf_path)
-        
+        # Extract text from PDF, stopping OCR as soon as enough pages
+        # have been read: typical bills carry every field on page 1, so
+        # the remaining pages of a multi-page scan never need recognizing
+        def _have_all_fields(partial_text):
+            return len(self.scan_fields(partial_text)) == len(self._field_pattern_lists)
+
+        text = self.extract_text_from_pdf(pdf_path, early_stop=_have_all_fields)
+
         if not text or text.strip() == '':
             return {
                 'success': False,
@@ -448,23 +738,71 @@ class PDFBillExtractor:
                 )
             }
         
-        # Extract all fields
+        # One combined pass resolves most fields; the per-field cascades
+        # (which try patterns in priority order) cover whatever it missed
+        found = self.scan_fields(text)
+
+        # Lowercased once here and shared by every fallback cascade
+        text_l = text.lower()
+
+        def fallback(name, extractor):
+            value = found.get(name)
+            if value is not None:
+                return value
+            # No pattern of this field can match when every one is
+            # anchored and no anchor occurs in the document
+            if not self._field_always_scans[name] and not any(
+                    anchor in text_l for anchor in self._field_anchors[name]):
+                return None
+            return extractor(text, text_l)
+
         extracted_data = {
             'success': True,
             'extracted_text': text[:1000] if len(text) > 1000 else text,  # First 1000 chars for reference
-            'patient_id': self.extract_patient_id(text),
-            'age': self.extract_age(text),
-            'gender': self.extract_gender(text),
-            'diagnosis_code': self.extract_diagnosis_code(text),
-            'procedure_code': self.extract_procedure_code(text),
-            'treatment_cost': self.extract_cost(text),
-            'insurance_coverage_limit': self.extract_coverage_limit(text),
-            'hospital_id': self.extract_hospital_id(text),
+            'patient_id': fallback('patient_id', self.extract_patient_id),
+            'age': fallback('age', self.extract_age),
+            'gender': fallback('gender', self.extract_gender),
+            'diagnosis_code': fallback('diagnosis_code', self.extract_diagnosis_code),
+            'procedure_code': fallback('procedure_code', self.extract_procedure_code),
+            'treatment_cost': fallback('treatment_cost', self.extract_cost),
+            'insurance_coverage_limit': fallback('insurance_coverage_limit', self.extract_coverage_limit),
+            'hospital_id': fallback('hospital_id', self.extract_hospital_id),
         }
-        
+
         return extracted_data
 
 
+# One extractor per worker process, built lazily on the first task so
+# pattern compilation and OCR configuration happen once per worker
+_worker_extractor = None
+
+
+def _extract_one(pdf_path):
+    """Worker entry point for extract_batch"""
+    global _worker_extractor
+    if _worker_extractor is None:
+        _worker_extractor = PDFBillExtractor()
+    return _worker_extractor.extract_all_fields(pdf_path)
+
+
+def extract_batch(pdf_paths):
+    """Extract fields from many PDFs in parallel worker processes.
+
+    Per-PDF work mixes CPU-bound Python (PIL decode, regex) with
+    tesseract subprocess waits, so separate processes scale with cores
+    where threads would serialize the Python half on the GIL. Each
+    worker re-imports this module, which sets OMP_THREAD_LIMIT=1, so
+    its tesseract stays single-threaded. Results come back in input
+    order.
+    """
+    pdf_paths = list(pdf_paths)
+    if not pdf_paths:
+        return []
+    with ProcessPoolExecutor(
+            max_workers=min(len(pdf_paths), os.cpu_count() or 2)) as ex:
+        return list(ex.map(_extract_one, pdf_paths))
+
+
 def allowed_file(filename):
     """Check if file is allowed (PDF)"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() == 'pdf'
@@ -3,41 +3,80 @@ Rule-Based Validation Engine
 Healthcare compliance rules and fraud detection
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
 
 class ValidationRulesEngine:
     """Implements healthcare billing rules"""
-    
+
+    # Constant tables live on the class: request handlers that build an
+    # engine per request share one copy instead of rebuilding them.
+
+    # Valid diagnosis-procedure mappings
+    valid_mappings = {
+        'E10': ['99213', '99214', '99215', '92004'],
+        'E11': ['99213', '99214', '99215', '92004'],
+        'I10': ['99213', '99214', '99215', '93000'],
+        'J44': ['94002', '94010', '94060', '94664'],
+        'F32': ['99204', '99205', '90834', '90837'],
+        'M79': ['99213', '99214', '20610', '97110'],
+        'E78': ['99213', '99214', '99215', '80053'],
+        'K21': ['99213', '99214', '43235', '43239'],
+        'N18': ['99213', '99214', '99215', '36145'],
+        'R07': ['99213', '99214', '93000', '71020'],
+        'J06': ['99213', '99214', '69210', '92002'],
+        'N39': ['99213', '99214', '81000', '81001'],
+        'M99': ['99213', '98941', '98942', '97110'],
+        'E66': ['99213', '99214', '99215', '99217'],
+        'F41': ['99204', '99205', '90834', '90836'],
+        'Z79': ['99213', '99214', '99215', '90834'],
+        'R06': ['99213', '99214', '94002', '94060'],
+        'I39': ['99213', '99214', '99215', '93000'],
+        'J20': ['99213', '99214', '71046', '71047'],
+        'K59': ['99213', '99214', '99215', '74150']
+    }
+
+    # Hash-based views of the mapping table: membership checks in the
+    # rules become O(1) instead of scanning a list per claim
+    _known_dx = frozenset(valid_mappings)
+    _valid_pairs = frozenset(
+        (d, p) for d, procs in valid_mappings.items() for p in procs
+    )
+
+    # Reasonable cost ranges per procedure
+    cost_ranges = {
+        '99213': (150, 500), '99214': (200, 600), '99215': (300, 800),
+        '92004': (200, 600), '93000': (150, 400), '94002': (100, 250),
+        '94010': (150, 350), '94060': (100, 250), '94664': (200, 500),
+        '90834': (150, 300), '90837': (200, 400), '20610': (300, 800),
+        '97110': (100, 300), '43235': (400, 1000), '43239': (500, 1200),
+        '36145': (200, 500), '81000': (30, 200), '81001': (50, 250),
+        '69210': (200, 500), '92002': (150, 400), '98941': (100, 200),
+        '98942': (150, 350), '99217': (100, 300), '90836': (200, 400),
+        '74150': (200, 600), '71046': (150, 400), '71047': (200, 500),
+        '80053': (50, 200)
+    }
+
+    # Constant sets used by the age rule
+    _pediatric_flagged_dx = frozenset(('E10', 'I10', 'N18'))
+    _elderly_flagged_procs = frozenset(('97110', '20610', '43235', '43239'))
+    _invasive_procs = frozenset(('43235', '43239'))
+
     def __init__(self, claims_df=None):
         self.claims_df = claims_df
         self.validation_results = []
-        
-        # Valid diagnosis-procedure mappings
-        self.valid_mappings = {
-            'E10': ['99213', '99214', '99215', '92004'],
-            'E11': ['99213', '99214', '99215', '92004'],
-            'I10': ['99213', '99214', '99215', '93000'],
-            'J44': ['94002', '94010', '94060', '94664'],
-            'F32': ['99204', '99205', '90834', '90837'],
-            'M79': ['99213', '99214', '20610', '97110'],
-            'E78': ['99213', '99214', '99215', '80053'],
-            'K21': ['99213', '99214', '43235', '43239'],
-            'N18': ['99213', '99214', '99215', '36145'],
-            'R07': ['99213', '99214', '93000', '71020'],
-            'J06': ['99213', '99214', '69210', '92002'],
-            'N39': ['99213', '99214', '81000', '81001'],
-            'M99': ['99213', '98941', '98942', '97110'],
-            'E66': ['99213', '99214', '99215', '99217'],
-            'F41': ['99204', '99205', '90834', '90836'],
-            'Z79': ['99213', '99214', '99215', '90834'],
-            'R06': ['99213', '99214', '94002', '94060'],
-            'I39': ['99213', '99214', '99215', '93000'],
-            'J20': ['99213', '99214', '71046', '71047'],
-            'K59': ['99213', '99214', '99215', '74150']
-        }
-    
+
+        # Rule table built once per engine instead of per validate_claim call
+        self.rules = [
+            ('Rule 1: Coverage Limit', self.rule_cost_not_exceeds_coverage),
+            ('Rule 2: Diagnosis-Procedure Mapping', self.rule_valid_diagnosis_procedure_mapping),
+            ('Rule 3: Cost Range', self.rule_cost_range_validation),
+            ('Rule 4: Age Specific', self.rule_age_specific_validation),
+            ('Rule 5: Pattern Analysis', self.rule_pattern_analysis),
+        ]
+
     def rule_cost_not_exceeds_coverage(self, claim):
         """Rule 1: Cost must not exceed insurance coverage limit"""
         cost = claim['treatment_cost']
@@ -56,14 +95,14 @@ class ValidationRulesEngine:
         diagnosis = claim['diagnosis_code']
         procedure = claim['procedure_code']
         
-        if diagnosis not in self.valid_mappings:
+        if diagnosis not in self._known_dx:
             return {
                 'passed': False,
                 'reason': f'Unknown diagnosis code: {diagnosis}',
                 'severity': 'high'
             }
-        
-        if procedure not in self.valid_mappings[diagnosis]:
+
+        if (diagnosis, procedure) not in self._valid_pairs:
             return {
                 'passed': False,
                 'reason': f'Procedure {procedure} not valid for diagnosis {diagnosis}',
@@ -76,23 +115,10 @@ class ValidationRulesEngine:
         """Rule 3: Cost must be within reasonable range for procedure"""
         procedure = claim['procedure_code']
         cost = claim['treatment_cost']
-        
-        # Reasonable cost ranges per procedure
-        cost_ranges = {
-            '99213': (150, 500), '99214': (200, 600), '99215': (300, 800),
-            '92004': (200, 600), '93000': (150, 400), '94002': (100, 250),
-            '94010': (150, 350), '94060': (100, 250), '94664': (200, 500),
-            '90834': (150, 300), '90837': (200, 400), '20610': (300, 800),
-            '97110': (100, 300), '43235': (400, 1000), '43239': (500, 1200),
-            '36145': (200, 500), '81000': (30, 200), '81001': (50, 250),
-            '69210': (200, 500), '92002': (150, 400), '98941': (100, 200),
-            '98942': (150, 350), '99217': (100, 300), '90836': (200, 400),
-            '74150': (200, 600), '71046': (150, 400), '71047': (200, 500),
-            '80053': (50, 200)
-        }
-        
-        if procedure in cost_ranges:
-            min_cost, max_cost = cost_ranges[procedure]
+
+        rng = self.cost_ranges.get(procedure)
+        if rng is not None:
+            min_cost, max_cost = rng
             if cost < min_cost or cost > max_cost:
                 return {
                     'passed': False,
@@ -109,17 +135,17 @@ class ValidationRulesEngine:
         procedure = claim['procedure_code']
         
         # Age-specific rules
-        if age < 18 and diagnosis in ['E10', 'I10', 'N18']:
+        if age < 18 and diagnosis in self._pediatric_flagged_dx:
             if diagnosis == 'E10' and age < 5:
                 return {
                     'passed': False,
                     'reason': f'Type 1 diabetes diagnosis unusual for age {age}',
                     'severity': 'medium'
                 }
-        
-        if age > 80 and procedure in ['97110', '20610', '43235', '43239']:
+
+        if age > 80 and procedure in self._elderly_flagged_procs:
             # More stringent for elderly with physical procedures
-            if procedure in ['43235', '43239']:
+            if procedure in self._invasive_procs:
                 return {
                     'passed': False,
                     'reason': f'Invasive procedure {procedure} flagged for elderly patient age {age}',
@@ -178,18 +204,10 @@ class ValidationRulesEngine:
     
     def validate_claim(self, claim, all_claims_df=None):
         """Run all validation rules on a claim"""
-        rules = [
-            ('Rule 1: Coverage Limit', self.rule_cost_not_exceeds_coverage),
-            ('Rule 2: Diagnosis-Procedure Mapping', self.rule_valid_diagnosis_procedure_mapping),
-            ('Rule 3: Cost Range', self.rule_cost_range_validation),
-            ('Rule 4: Age Specific', self.rule_age_specific_validation),
-            ('Rule 5: Pattern Analysis', self.rule_pattern_analysis),
-        ]
-        
         validation_details = []
         failed_rules = []
-        
-        for rule_name, rule_func in rules:
+
+        for rule_name, rule_func in self.rules:
             try:
                 result = rule_func(claim)
                 validation_details.append({
@@ -229,15 +247,127 @@ class ValidationRulesEngine:
         }
     
     def validate_batch(self, claims_df):
-        """Validate multiple claims"""
+        """Validate multiple claims with vectorised rule checks.
+
+        Every rule predicate runs as a whole-column numpy expression
+        instead of per-row Python dispatch; only the human-readable
+        reason strings are assembled row by row, since they interpolate
+        per-row values anyway. Output matches validate_claim's shape
+        exactly.
+        """
         self.claims_df = claims_df
+
+        cost = claims_df['treatment_cost'].to_numpy(dtype=float)
+        limit = claims_df['insurance_coverage_limit'].to_numpy(dtype=float)
+        age = claims_df['age'].to_numpy()
+        dx = claims_df['diagnosis_code']
+        proc = claims_df['procedure_code']
+        dx_np = dx.to_numpy()
+        proc_np = proc.to_numpy()
+
+        # Rule 1: cost must not exceed coverage
+        r1_fail = cost > limit
+
+        # Rule 2: diagnosis known and procedure valid for it
+        r2_unknown = ~dx.isin(self._known_dx).to_numpy()
+        r2_pair_ok = pd.MultiIndex.from_arrays([dx, proc]).isin(self._valid_pairs)
+        r2_fail = r2_unknown | ~r2_pair_ok
+
+        # Rule 3: cost within the procedure's normal range; procedures
+        # without a range map to NaN and pass
+        lo = proc.map({p: r[0] for p, r in self.cost_ranges.items()}).to_numpy(dtype=float)
+        hi = proc.map({p: r[1] for p, r in self.cost_ranges.items()}).to_numpy(dtype=float)
+        r3_fail = ~np.isnan(lo) & ((cost < lo) | (cost > hi))
+
+        # Rule 4: age-specific checks (the nested conditions in
+        # rule_age_specific_validation reduce to these two masks)
+        r4_young = (age < 5) & (dx_np == 'E10')
+        r4_elder = (age > 80) & np.isin(proc_np, ('43235', '43239'))
+
+        # Rule 5: cost-to-coverage ratio
+        ratio = cost / (limit + 1)
+        r5_high = ratio > 2.0
+        r5_med = (ratio > 1.0) & ~r5_high
+
+        high_fail = r1_fail | r2_fail | r5_high
+        any_fail = high_fail | r3_fail | r4_young | r4_elder | r5_med
+        status = np.where(high_fail, 'Rejected',
+                          np.where(any_fail, 'Manual Review', 'Approved'))
+
+        if 'claim_id' in claims_df.columns:
+            claim_ids = claims_df['claim_id'].to_numpy()
+        else:
+            claim_ids = [f'CLM{idx:06d}' for idx in claims_df.index]
+
+        rule_names = [name for name, _func in self.rules]
         results = []
-        
-        for idx, row in claims_df.iterrows():
-            result = self.validate_claim(row.to_dict(), claims_df)
-            result['claim_id'] = row.get('claim_id', f'CLM{idx:06d}')
-            results.append(result)
-        
+        for i in range(len(claims_df)):
+            checks = []
+            if r1_fail[i]:
+                checks.append((rule_names[0], False,
+                               f'Cost ${cost[i]:,.2f} exceeds coverage limit ${limit[i]:,.2f}',
+                               'high'))
+            else:
+                checks.append((rule_names[0], True,
+                               'Cost within coverage limit', 'info'))
+
+            if r2_unknown[i]:
+                checks.append((rule_names[1], False,
+                               f'Unknown diagnosis code: {dx_np[i]}', 'high'))
+            elif r2_fail[i]:
+                checks.append((rule_names[1], False,
+                               f'Procedure {proc_np[i]} not valid for diagnosis {dx_np[i]}',
+                               'high'))
+            else:
+                checks.append((rule_names[1], True,
+                               'Valid diagnosis-procedure mapping', 'info'))
+
+            if r3_fail[i]:
+                checks.append((rule_names[2], False,
+                               f'Cost ${cost[i]:,.2f} outside normal range ${int(lo[i])}-${int(hi[i])} for {proc_np[i]}',
+                               'medium'))
+            else:
+                checks.append((rule_names[2], True,
+                               'Cost within reasonable range', 'info'))
+
+            if r4_young[i]:
+                checks.append((rule_names[3], False,
+                               f'Type 1 diabetes diagnosis unusual for age {age[i]}',
+                               'medium'))
+            elif r4_elder[i]:
+                checks.append((rule_names[3], False,
+                               f'Invasive procedure {proc_np[i]} flagged for elderly patient age {age[i]}',
+                               'medium'))
+            else:
+                checks.append((rule_names[3], True,
+                               'Age-appropriate procedure', 'info'))
+
+            if r5_high[i]:
+                checks.append((rule_names[4], False,
+                               f'Extremely high cost-to-coverage ratio: {ratio[i]:.2f}x',
+                               'high'))
+            elif r5_med[i]:
+                checks.append((rule_names[4], False,
+                               f'High cost-to-coverage ratio: {ratio[i]:.2f}x',
+                               'medium'))
+            else:
+                checks.append((rule_names[4], True,
+                               'Normal cost-to-coverage ratio', 'info'))
+
+            fail_reasons = [reason for _name, passed, reason, _sev in checks
+                            if not passed]
+            results.append({
+                'status': status[i],
+                'reason': ' | '.join(fail_reasons) if fail_reasons else 'All rules passed',
+                'details': [
+                    {'rule': name, 'passed': passed, 'reason': reason,
+                     'severity': severity}
+                    for name, passed, reason, severity in checks
+                ],
+                'failed_count': len(fail_reasons),
+                'claim_id': claim_ids[i],
+            })
+
         return pd.DataFrame(results)
 
 
@@ -4,26 +4,94 @@ Setup Poppler for PDF extraction
 Copies Poppler from Downloads to Program Files and configures PATH
 """
 
+import json
 import shutil
 import os
+import subprocess
 import sys
+import threading
+import uuid
+from collections import deque
 from pathlib import Path
 
+def find_installed_poppler():
+    """Locate an already-usable Poppler bin dir via registry and PATH
+
+    Chocolatey/Scoop/winget installs (and previous runs of this script)
+    leave pdftoppm reachable without any copying; finding one turns the
+    whole setup into a registry read plus a PATH scan.
+    """
+
+    exe = "pdftoppm.exe" if os.name == "nt" else "pdftoppm"
+
+    # Windows App Paths registration
+    if os.name == "nt":
+        try:
+            import winreg
+            key_path = (r"SOFTWARE\Microsoft\Windows\CurrentVersion"
+                        r"\App Paths\pdftoppm.exe")
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, key_path) as key:
+                exe_path, _ = winreg.QueryValueEx(key, None)
+            if exe_path and os.path.exists(exe_path):
+                return os.path.dirname(exe_path)
+        except (ImportError, OSError):
+            pass
+
+    # Any poppler-ish PATH entry that actually holds the binary
+    for entry in os.environ.get("PATH", "").split(os.pathsep):
+        if entry and "poppler" in entry.lower() \
+                and os.path.exists(os.path.join(entry, exe)):
+            return entry
+
+    return None
+
+
 def setup_poppler():
     """Setup Poppler installation"""
-    
+
+    # A usable Poppler may already exist on the machine; skip the whole
+    # copy/install path when it does
+    existing = find_installed_poppler()
+    if existing:
+        print(f"✅ Using existing Poppler: {existing}")
+        update_system_path(existing)
+        update_pdf_extractor_path(existing)
+        return True
+
     # Possible source locations
     sources = [
         r"C:\Users\HP\Downloads\poppler-windows-25.12.0-0\poppler-windows-25.12.0-0",
         r"C:\Users\HP\Downloads\poppler-26.1.0",
         r"C:\Program Files\poppler",
     ]
-    
+
+    # Auto-detect any extracted poppler-* release in Downloads with one
+    # scandir pass, so version bumps don't require editing the list above
+    downloads = r"C:\Users\HP\Downloads"
+    try:
+        with os.scandir(downloads) as entries:
+            sources = [
+                entry.path for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+                and entry.name.lower().startswith("poppler")
+            ] + sources
+    except OSError:
+        pass
+
+    # Dedup by normalized path so overlapping entries only cost one stat
+    seen = set()
+    uniq = []
+    for s in sources:
+        key = os.path.normcase(os.path.normpath(s))
+        if key not in seen:
+            seen.add(key)
+            uniq.append(s)
+
     dest = r"C:\Program Files\poppler"
-    
+
     # Find existing Poppler
     source = None
-    for s in sources:
+    for s in uniq:
         if os.path.exists(s):
             print(f"✅ Found Poppler at: {s}")
             source = s
@@ -42,13 +110,27 @@ def setup_poppler():
     # Copy to Program Files
     print(f"\nCopying Poppler to {dest}...")
     try:
+        # Rename the old install aside instead of walking it with rmtree
+        # while the user waits; the recursive delete happens on a
+        # background thread after the new install is in place
+        quarantine = None
         if os.path.exists(dest):
             print(f"Removing old installation...")
-            shutil.rmtree(dest, ignore_errors=True)
-        
-        shutil.copytree(source, dest)
-        print(f"✅ Successfully copied")
-        
+            quarantine = dest + ".old-" + uuid.uuid4().hex
+            try:
+                os.rename(dest, quarantine)
+            except OSError:
+                quarantine = None
+                shutil.rmtree(dest, ignore_errors=True)
+
+        install_tree(source, dest)
+        print(f"✅ Successfully installed")
+
+        if quarantine:
+            threading.Thread(target=shutil.rmtree, args=(quarantine,),
+                             kwargs={"ignore_errors": True},
+                             daemon=True).start()
+
         # Verify
         return verify_poppler(dest)
         
@@ -61,6 +143,55 @@ def setup_poppler():
         return False
 
 
+def install_tree(source, dest):
+    """Install source at dest, avoiding a bulk copy when possible
+
+    When both paths sit on the same volume the ~50 MB of Poppler DLLs
+    never need to be re-read: an NTFS junction (or failing that, a tree
+    of hardlinks) gives identical semantics for a handful of metadata
+    operations. Falls back to a real copy across volumes or when links
+    are disallowed.
+    """
+
+    try:
+        same_volume = (os.stat(source).st_dev
+                       == os.stat(os.path.dirname(dest) or ".").st_dev)
+    except OSError:
+        same_volume = False
+
+    if same_volume and os.name == "nt":
+        try:
+            subprocess.run(["cmd", "/c", "mklink", "/J", dest, source],
+                           check=True, capture_output=True)
+            print(f"✅ Created junction: {dest} -> {source}")
+            return
+        except (OSError, subprocess.CalledProcessError):
+            pass  # junctions can be disallowed by policy; try hardlinks
+
+    if same_volume:
+        try:
+            hardlink_tree(source, dest)
+            print(f"✅ Hardlinked into: {dest}")
+            return
+        except OSError:
+            shutil.rmtree(dest, ignore_errors=True)
+
+    shutil.copytree(source, dest)
+
+
+def hardlink_tree(source, dest):
+    """Recreate source under dest using hardlinks instead of file copies"""
+
+    os.makedirs(dest, exist_ok=True)
+    with os.scandir(source) as entries:
+        for entry in entries:
+            target = os.path.join(dest, entry.name)
+            if entry.is_dir(follow_symlinks=False):
+                hardlink_tree(entry.path, target)
+            else:
+                os.link(entry.path, target)
+
+
 def verify_poppler(path):
     """Verify Poppler installation"""
     
@@ -75,103 +206,149 @@ def verify_poppler(path):
         return True
     else:
         print(f"⚠️  pdftoppm.exe not found at expected location")
-        # Try to find it
-        for root, dirs, files in os.walk(path):
-            if "pdftoppm.exe" in files:
-                full_path = os.path.join(root, "pdftoppm.exe")
-                print(f"✅ Found at: {full_path}")
-                
-                bin_dir = os.path.dirname(full_path)
-                update_system_path(bin_dir)
-                update_pdf_extractor_path(bin_dir)
-                return True
-        
+        # Try to find it - breadth-first scandir so we stop at the first
+        # hit instead of walking the whole tree, and skip subtrees that
+        # never contain binaries
+        full_path = find_pdftoppm(path)
+        if full_path:
+            print(f"✅ Found at: {full_path}")
+
+            bin_dir = os.path.dirname(full_path)
+            update_system_path(bin_dir)
+            update_pdf_extractor_path(bin_dir)
+            return True
+
         print(f"❌ pdftoppm.exe not found in {path}")
         return False
 
 
+def find_pdftoppm(path):
+    """Search a Poppler tree for pdftoppm.exe, returning its full path"""
+
+    skip_dirs = {"share", "include", "doc", "docs"}
+    queue = deque([path])
+
+    while queue:
+        directory = queue.popleft()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name == "pdftoppm.exe":
+                        return entry.path
+                    if (entry.is_dir(follow_symlinks=False)
+                            and entry.name.lower() not in skip_dirs):
+                        queue.append(entry.path)
+        except OSError:
+            continue
+
+    return None
+
+
 def update_system_path(bin_path):
     """Add path to system PATH"""
     
     try:
         current_path = os.environ.get('PATH', '')
-        
-        if bin_path not in current_path:
+
+        # Compare whole normcased entries, not substrings - a substring
+        # scan false-positives on paths that merely contain bin_path.
+        # The parsed set is cached on the function so repeat calls in
+        # one process skip the split.
+        cached = update_system_path.cache
+        if cached is None or cached[0] != current_path:
+            entries = {os.path.normcase(p)
+                       for p in current_path.split(os.pathsep) if p}
+            update_system_path.cache = cached = (current_path, entries)
+
+        if os.path.normcase(bin_path) not in cached[1]:
             os.environ['PATH'] = bin_path + os.pathsep + current_path
+            update_system_path.cache = None
             print(f"✅ Added to PATH: {bin_path}")
         else:
             print(f"✅ Already in PATH: {bin_path}")
-        
+
         return True
     except Exception as e:
         print(f"⚠️  Error updating PATH: {e}")
         return False
 
 
+update_system_path.cache = None
+
+
 def update_pdf_extractor_path(bin_path):
-    """Update pdf_extractor.py with Poppler path"""
-    
+    """Record the Poppler path in the extractor's sidecar config
+
+    Discovered paths go to ml/poppler_paths.json, which
+    configure_poppler in pdf_extractor.py reads at import. The Python
+    source stays immutable - no re-splicing on every setup run, no
+    merge conflicts in version control.
+    """
+
+    sidecar = os.path.join("ml", "poppler_paths.json")
+
     try:
-        pdf_extractor_path = "ml/pdf_extractor.py"
-        
-        if not os.path.exists(pdf_extractor_path):
-            print(f"⚠️  {pdf_extractor_path} not found")
+        if not os.path.isdir("ml"):
+            print(f"⚠️  ml/ directory not found")
             return False
-        
-        with open(pdf_extractor_path, 'r') as f:
-            content = f.read()
-        
-        # Check if already has this path
-        if bin_path in content:
-            print(f"✅ Path already in pdf_extractor.py")
-            return True
-        
-        # Add to configure_poppler function
-        new_path_entry = f'        r"{bin_path}",  # Downloaded Poppler\n'
-        
-        # Find the poppler_paths list and add to it
-        if "poppler_paths = [" in content:
-            idx = content.find("poppler_paths = [")
-            idx = content.find("[", idx) + 1
-            idx = content.find("\n", idx)
-            content = content[:idx] + f'\n{new_path_entry}' + content[idx:]
-            
-            with open(pdf_extractor_path, 'w') as f:
-                f.write(content)
-            
-            print(f"✅ Updated pdf_extractor.py with Poppler path")
+
+        try:
+            with open(sidecar) as f:
+                paths = set(json.load(f))
+        except (OSError, ValueError):
+            paths = set()
+
+        if bin_path in paths:
+            print(f"✅ Path already in {sidecar}")
             return True
-        
-        return False
-        
+
+        paths.add(bin_path)
+        tmp_path = sidecar + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(sorted(paths), f, indent=2)
+        os.replace(tmp_path, sidecar)
+
+        print(f"✅ Recorded Poppler path in {sidecar}")
+        return True
+
     except Exception as e:
-        print(f"⚠️  Error updating pdf_extractor.py: {e}")
+        print(f"⚠️  Error updating {sidecar}: {e}")
         return False
 
 
 if __name__ == "__main__":
-    print("=" * 60)
-    print("Poppler Setup for Medical Billing Validation App")
-    print("=" * 60)
-    print()
-    
+    bar = "=" * 60
+    sys.stdout.write(
+        f"{bar}\n"
+        "Poppler Setup for Medical Billing Validation App\n"
+        f"{bar}\n\n"
+    )
+    sys.stdout.flush()
+
     success = setup_poppler()
-    
-    print()
-    print("=" * 60)
+
+    # Build the trailer once and write it in one call rather than a
+    # print (and a console flush) per line
     if success:
-        print("✅ Poppler setup completed successfully!")
-        print()
-        print("Next steps:")
-        print("1. Restart your terminal/IDE")
-        print("2. Restart the Flask app: python run.py")
-        print("3. Try uploading a PDF")
-        sys.exit(0)
+        trailer = f"""
+{bar}
+✅ Poppler setup completed successfully!
+
+Next steps:
+1. Restart your terminal/IDE
+2. Restart the Flask app: python run.py
+3. Try uploading a PDF
+"""
     else:
-        print("⚠️  Poppler setup incomplete")
-        print()
-        print("Manual alternatives:")
-        print("1. Download from: https://github.com/oschwartz10612/poppler-windows/releases/")
-        print("2. Extract to: C:\\Program Files\\poppler")
-        print("3. Or use the app's 'Enter Manually' tab (always works)")
-        sys.exit(1)
+        trailer = f"""
+{bar}
+⚠️  Poppler setup incomplete
+
+Manual alternatives:
+1. Download from: https://github.com/oschwartz10612/poppler-windows/releases/
+2. Extract to: C:\\Program Files\\poppler
+3. Or use the app's 'Enter Manually' tab (always works)
+"""
+    sys.stdout.write(trailer)
+    sys.stdout.flush()
+    sys.exit(0 if success else 1)
@@ -4,20 +4,37 @@ Medical Billing Validation System - Smart Startup Script
 Automatically handles setup and starts the application
 """
 
+import hashlib
 import os
 import sys
 import subprocess
-import platform
+from concurrent.futures import ThreadPoolExecutor
+
+# os.name is a plain attribute read; platform.system() can hit uname(2)
+# and was being paid per instance without ever being used
+_IS_WINDOWS = os.name == 'nt'
 
 class MedicalBillingStartup:
+    # The 100k-record CSV weighs in around 7 MB; anything below this is
+    # a truncated copy that would otherwise fail minutes later during
+    # model training
+    DATASET_MIN_BYTES = 1 << 20
+
     def __init__(self):
         self.project_dir = os.path.dirname(os.path.abspath(__file__))
-        self.os_type = platform.system()
+        self.data_dir = os.path.join(self.project_dir, 'data')
+        self.models_dir = os.path.join(self.project_dir, 'models')
         
     def print_header(self):
-        print("\n" + "=" * 70)
-        print("  MEDICAL BILLING VALIDATION SYSTEM - STARTUP")
-        print("=" * 70 + "\n")
+        # One write instead of a print per line: each print acquires the
+        # stdout lock and flushes separately on line-buffered consoles
+        bar = "=" * 70
+        sys.stdout.write(
+            f"\n{bar}\n"
+            "  MEDICAL BILLING VALIDATION SYSTEM - STARTUP\n"
+            f"{bar}\n\n"
+        )
+        sys.stdout.flush()
     
     def check_python(self):
         """Check Python version"""
@@ -32,60 +49,135 @@ class MedicalBillingStartup:
     def check_dependencies(self):
         """Check if required packages are installed"""
         print("\n[2/5] Checking dependencies...")
-        required = ['flask', 'flask_sqlalchemy', 'pandas', 'sklearn', 'numpy']
+        # Fast path: if requirements.txt hasn't changed since the last
+        # successful start, skip the metadata scan entirely
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'medbill')
+        sentinel = os.path.join(cache_dir, 'deps.ok')
+        req_sha = None
+        try:
+            with open(os.path.join(self.project_dir, 'requirements.txt'), 'rb') as f:
+                req_sha = hashlib.sha256(f.read()).hexdigest()
+            with open(sentinel) as f:
+                if f.read().strip() == req_sha:
+                    print("✓ Dependencies unchanged since last successful start")
+                    return True
+        except OSError:
+            pass
+
+        # Import name -> pip distribution name. find_spec resolves each
+        # module through the import finders without executing any module
+        # code, so heavyweight packages (pandas, sklearn) are never
+        # imported just to probe them - and unlike a metadata scan it
+        # checks the actual import name, so no normalization is needed
+        required = {
+            'flask': 'flask',
+            'flask_sqlalchemy': 'flask-sqlalchemy',
+            'pandas': 'pandas',
+            'sklearn': 'scikit-learn',
+            'numpy': 'numpy',
+        }
+        from importlib.util import find_spec
         missing = []
-        
-        for package in required:
-            try:
-                __import__(package)
+
+        for package, dist_name in required.items():
+            if find_spec(package) is not None:
                 print(f"  ✓ {package}")
-            except ImportError:
+            else:
                 print(f"  ✗ {package}")
-                missing.append(package)
+                missing.append(dist_name)
         
         if missing:
             print("\n  Installing missing packages...")
-            for package in missing:
-                subprocess.run([sys.executable, '-m', 'pip', 'install', package, '-q'])
+            # One pip invocation for all of them: the resolver and
+            # downloader warm up once instead of per package
+            subprocess.run([sys.executable, '-m', 'pip', 'install', '-q',
+                            '--prefer-binary', '--no-input',
+                            '--cache-dir', os.path.join(cache_dir, 'wheels'),
+                            *missing],
+                           check=True)
             print("  ✓ Dependencies installed")
-        
+
+        if req_sha:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(sentinel, 'w') as f:
+                    f.write(req_sha)
+            except OSError:
+                pass  # cache is best-effort; next run just re-probes
+
         return True
     
-    def check_data(self):
-        """Check if dataset exists"""
+    def check_data(self, st=None):
+        """Check the dataset exists and isn't truncated"""
         print("\n[3/5] Checking dataset...")
-        dataset_file = os.path.join(self.project_dir, 'data', 'medical_billing_dataset.csv')
-        
-        if os.path.exists(dataset_file):
+        if st is None:
+            st = self._stat_dataset()
+
+        if st and st.st_size >= self.DATASET_MIN_BYTES:
+            # One stat gives existence and size; the sentinel remembers
+            # the mtime/size pair so an unchanged dataset is accepted
+            # without re-validating on later runs
+            stamp = f"{st.st_mtime_ns} {st.st_size}"
+            sentinel = os.path.join(self.data_dir, '.dataset.ok')
+            try:
+                with open(sentinel) as f:
+                    if f.read().strip() == stamp:
+                        print("✓ Dataset found (validated on a previous run)")
+                        return True
+            except OSError:
+                pass
             print("✓ Dataset found")
+            try:
+                with open(sentinel, 'w') as f:
+                    f.write(stamp)
+            except OSError:
+                pass
             return True
+
+        if st:
+            print(f"✗ Dataset looks truncated ({st.st_size} bytes). Regenerating...")
         else:
             print("✗ Dataset not found. Generating...")
-            self.generate_dataset()
-            return True
+        self.generate_dataset()
+        return True
+
+    def _stat_dataset(self):
+        """os.stat result for the dataset CSV, or False when absent"""
+        try:
+            return os.stat(os.path.join(self.data_dir, 'medical_billing_dataset.csv'))
+        except OSError:
+            return False
     
     def generate_dataset(self):
         """Generate synthetic dataset"""
         print("  Generating 100,000 synthetic records...")
         os.chdir(self.project_dir)
-        subprocess.run([sys.executable, 'generate_dataset.py'], check=True)
+        # Run in-process when the module is importable - a fresh
+        # interpreter costs a few hundred ms before any real work starts
+        try:
+            import generate_dataset as generator
+            generator.main()
+        except (ImportError, AttributeError):
+            subprocess.run([sys.executable, 'generate_dataset.py'], check=True)
         print("  ✓ Dataset generated")
     
-    def check_models(self):
+    def check_models(self, present=None):
         """Check if ML models exist"""
         print("\n[4/5] Checking ML models...")
-        models_dir = os.path.join(self.project_dir, 'models')
         required_models = [
             'logistic_regression.pkl',
             'random_forest.pkl',
             'isolation_forest.pkl',
             'scaler.pkl'
         ]
-        
+
+        # One scandir of the models dir replaces a stat per model file
+        if present is None:
+            present = self._scan_models_dir()
+
         missing = []
         for model in required_models:
-            model_path = os.path.join(models_dir, model)
-            if os.path.exists(model_path):
+            if model in present:
                 print(f"  ✓ {model}")
             else:
                 print(f"  ✗ {model}")
@@ -94,17 +186,36 @@ class MedicalBillingStartup:
         if missing:
             print("\n  Training ML models...")
             os.chdir(self.project_dir)
-            subprocess.run([sys.executable, 'ml/ml_models.py'], check=True)
+            # Same in-process shortcut as generate_dataset: the training
+            # pipeline is ordinary Python, so call it directly instead of
+            # paying another interpreter spawn
+            try:
+                from ml import ml_models
+                ml_models.main()
+            except ImportError:
+                subprocess.run([sys.executable, 'ml/ml_models.py'], check=True)
             print("  ✓ Models trained")
-        
+
         return True
+
+    def _scan_models_dir(self):
+        """Return the set of file names present in the models directory"""
+        try:
+            return {entry.name for entry in os.scandir(self.models_dir)}
+        except OSError:
+            return set()
     
     def verify_app(self):
-        """Verify Flask app can be imported"""
+        """Verify Flask app package is importable"""
         print("\n[5/5] Verifying application...")
         try:
-            from app import app
-            from app.models import db
+            # Resolve the package without executing it - the real import
+            # (Flask routes, SQLAlchemy metadata) happens once, in run().
+            # Importing here would pay that cost twice per startup.
+            import importlib.util
+            if importlib.util.find_spec('app') is None:
+                print("✗ Error: 'app' package not found")
+                return False
             print("✓ Flask application verified")
             return True
         except Exception as e:
@@ -113,27 +224,38 @@ class MedicalBillingStartup:
     
     def print_info(self):
         """Print startup information"""
-        print("\n" + "=" * 70)
-        print("  STARTUP COMPLETE - READY TO RUN")
-        print("=" * 70)
-        print("\n  Access the application at:")
-        print("  → http://localhost:5000")
-        print("\n  Default test credentials:")
-        print("  Hospital Staff:")
-        print("    username: staff1")
-        print("    password: password123")
-        print("\n  Insurance Admin:")
-        print("    username: admin1")
-        print("    password: password123")
-        print("\n  Features:")
-        print("  ✓ 100,000 synthetic records")
-        print("  ✓ 3 ML models (93%+ accuracy)")
-        print("  ✓ 6 validation rules")
-        print("  ✓ Professional web interface")
-        print("  ✓ Role-based access control")
-        print("  ✓ Real-time analytics")
-        print("\n  Press Ctrl+C to stop the server")
-        print("=" * 70 + "\n")
+        bar = "=" * 70
+        banner = f"""
+{bar}
+  STARTUP COMPLETE - READY TO RUN
+{bar}
+
+  Access the application at:
+  → http://localhost:5000
+
+  Default test credentials:
+  Hospital Staff:
+    username: staff1
+    password: password123
+
+  Insurance Admin:
+    username: admin1
+    password: password123
+
+  Features:
+  ✓ 100,000 synthetic records
+  ✓ 3 ML models (93%+ accuracy)
+  ✓ 6 validation rules
+  ✓ Professional web interface
+  ✓ Role-based access control
+  ✓ Real-time analytics
+
+  Press Ctrl+C to stop the server
+{bar}
+
+"""
+        sys.stdout.write(banner)
+        sys.stdout.flush()
     
     def run(self):
         """Run startup sequence"""
@@ -141,16 +263,27 @@ class MedicalBillingStartup:
         
         if not self.check_python():
             return False
-        
-        if not self.check_dependencies():
+
+        # The dependency check (distribution-metadata scan, possibly a
+        # pip install) and the dataset/model stats are independent I/O,
+        # so overlap them. Remediation stays ordered: dataset generation
+        # and model training import the scientific stack, so check_data
+        # and check_models only run once the dependency future resolves.
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            deps_future = pool.submit(self.check_dependencies)
+            dataset_st = self._stat_dataset()
+            models_present = self._scan_models_dir()
+            deps_ok = deps_future.result()
+
+        if not deps_ok:
             return False
-        
-        if not self.check_data():
+
+        if not self.check_data(st=dataset_st):
             return False
-        
-        if not self.check_models():
+
+        if not self.check_models(present=models_present):
             return False
-        
+
         if not self.verify_app():
             return False
         